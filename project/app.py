@@ -6,15 +6,17 @@ from ui import (
     collection_section, progress_section, logs_section, theme
 )
 from core.collector import collect_responses, test_provider
+from core.concurrency import reset_endpoint_limiters
 from core.logger import Logger
-from core.utils import save_json, format_dataset_output
+from core.scheduler import LengthPredictor, save_response_lengths, LENGTHS_SUFFIX
+from core.utils import save_json, save_dataset_output, parse_stop_sequences, MAX_STOP_SEQUENCES
 
 def create_app():
     with gr.Blocks(title="LLM Response Collector") as app:
         gr.Markdown("# 🤖 Multi-Provider LLM Response Collector")
         
         # 1. Setup
-        short_tokens, long_tokens, system_prompt = setup_section.render()
+        short_tokens, long_tokens, system_prompt, stop_sequences, abort_repetition = setup_section.render()
         
         # 2. Dataset
         file_upload, dataset_info, dataset_state = dataset_section.render()
@@ -74,6 +76,7 @@ def create_app():
 
         async def run_collection(
             short_tokens, long_tokens, system_prompt,
+            stop_sequences, abort_repetition,
             dataset_loader,
             models,
             execution_mode,
@@ -97,11 +100,26 @@ def create_app():
             # Initialize running tasks
             running_tasks.clear()
 
+            # One concurrency limiter per self-hosted endpoint, probed afresh for each run
+            reset_endpoint_limiters()
+
+            output_dir = "outputs"
+            stop_list = parse_stop_sequences(stop_sequences)
+            if len(stop_list) > MAX_STOP_SEQUENCES:
+                logger.log(f"Warning: only the first {MAX_STOP_SEQUENCES} stop sequences are used; ignoring {len(stop_list) - MAX_STOP_SEQUENCES} more.")
+                stop_list = stop_list[:MAX_STOP_SEQUENCES]
+
+            # Shared across models so each run learns from earlier outputs and from the others
+            length_predictor = LengthPredictor()
+            loaded = await asyncio.to_thread(length_predictor.load_outputs, output_dir)
+            if loaded:
+                logger.log(f"Using response lengths from {loaded} previous output file(s) for scheduling.")
+
             # Initialize progress states
             # Map alias -> list representation
             progress_states = {}
             for m in models:
-                progress_states[m.alias] = [m.alias, "0.0%", f"0/{dataset_loader.num_questions}", "-", "Pending"]
+                progress_states[m.alias] = [m.alias, "0.0%", f"0/{dataset_loader.num_questions}", "-", "-", "Pending"]
             
             def get_progress_data():
                 return [progress_states[m.alias] for m in models]
@@ -122,17 +140,20 @@ def create_app():
                 running_tasks[model.alias] = asyncio.current_task()
                 
                 try:
-                    data, missing = await collect_responses(
+                    results, missing = await collect_responses(
                         model, dataset_loader, 
                         int(short_tokens), int(long_tokens), 
                         system_prompt, logger, progress_callback,
-                        collection_scope=collection_scope
+                        collection_scope=collection_scope,
+                        stop_sequences=stop_list,
+                        abort_repetition=bool(abort_repetition),
+                        length_predictor=length_predictor
                     )
                     
                     # Save outputs
-                    output_dir = "outputs"
-                    save_json(format_dataset_output(model.alias, data), os.path.join(output_dir, f"{model.alias}_dataset.json"))
+                    save_dataset_output(model.alias, results.iter_documents(), os.path.join(output_dir, f"{model.alias}_dataset.json"))
                     save_json(missing, os.path.join(output_dir, f"{model.alias}_missing_responses.json"))
+                    save_response_lengths(model.alias, results, os.path.join(output_dir, f"{model.alias}{LENGTHS_SUFFIX}"))
                 
                 except asyncio.CancelledError:
                     # Handled in collector.py but re-raised or returned?
@@ -208,6 +229,7 @@ def create_app():
             run_collection,
             inputs=[
                 short_tokens, long_tokens, system_prompt,
+                stop_sequences, abort_repetition,
                 dataset_state, models_state, execution_mode,
                 collection_scope
             ],
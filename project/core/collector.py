@@ -1,13 +1,26 @@
 import asyncio
 import time
 import traceback
-from typing import List, Dict, Any, Tuple
-from .provider import ModelConfig
+from typing import List, Dict, Any, Optional, Tuple
+from .provider import ModelConfig, Provider
 from .dataset_loader import DatasetLoader
 from .client_factory import make_client
 from .logger import Logger
 from .progress import ProgressState
-from .utils import AsyncRateLimiter
+from .utils import AsyncRateLimiter, is_degenerate_repetition
+from .concurrency import AdaptiveConcurrencyLimiter, get_endpoint_limiter
+from .result_store import ResultStore
+from .scheduler import LengthPredictor
+
+# Upper bound on in-flight requests the auto-tuner may reach for self-hosted endpoints
+MAX_SELF_HOSTED_CONCURRENCY = 32
+
+# How many new characters to stream between repetition checks
+REPETITION_CHECK_INTERVAL = 64
+
+def is_self_hosted(model_cfg: ModelConfig) -> bool:
+    """Self-hosted endpoints have no published quota, so concurrency is tuned from measurements."""
+    return model_cfg.provider == Provider.LM_STUDIO.value
 
 async def collect_responses(
     model_cfg: ModelConfig,
@@ -18,18 +31,33 @@ async def collect_responses(
     logger: Logger,
     progress_callback,
     should_stop: Any = None,
-    collection_scope: str = "Both"
-) -> Tuple[List[List[Dict]], List[Dict]]:
+    collection_scope: str = "Both",
+    stop_sequences: Optional[List[str]] = None,
+    abort_repetition: bool = False,
+    length_predictor: Optional[LengthPredictor] = None
+) -> Tuple[ResultStore, List[Dict]]:
     """
     Collects responses for a single model.
-    Returns (collected_data, missing_responses).
+    When requests run concurrently and a length_predictor is given, questions with
+    the longest predicted responses are sent first. With abort_repetition, responses
+    are streamed and cut off as soon as they degenerate into a repeating loop.
+    Returns (result_store, missing_responses).
     """
     
     client = make_client(model_cfg)
-    rate_limiter = AsyncRateLimiter(max_calls=6, period=1.0)
+    self_hosted = is_self_hosted(model_cfg)
+    # Hosted APIs keep the fixed request rate; self-hosted ones are limited by the auto-tuner only
+    rate_limiter = None if self_hosted else AsyncRateLimiter(max_calls=6, period=1.0)
+    if self_hosted:
+        # Models served from the same endpoint share one GPU, so they share one limiter
+        concurrency = get_endpoint_limiter(model_cfg.base_url, MAX_SELF_HOSTED_CONCURRENCY)
+        concurrency.start_model(model_cfg.model_name)
+    else:
+        concurrency = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1, adaptive=False)
+    num_workers = concurrency.max_limit
     
-    # Initialize output structure
-    collected_data = dataset_loader.get_empty_structure()
+    # Initialize output structure; it references the loader's entries instead of copying them
+    result_store = ResultStore(dataset_loader)
     missing_responses = []
     
     # Initialize progress
@@ -39,91 +67,172 @@ async def collect_responses(
         completed=0,
         total=total_questions,
         start_time=time.time(),
-        status="Running"
+        status="Running",
+        concurrency=concurrency.limit,
+        optimal_concurrency=concurrency.optimal_limit
     )
     progress_callback(progress)
     
-    logger.log(f"[{model_cfg.alias}] Starting collection...")
+    if self_hosted:
+        logger.log(f"[{model_cfg.alias}] Starting collection (auto-tuning concurrency up to {num_workers})...")
+    else:
+        logger.log(f"[{model_cfg.alias}] Starting collection...")
+
+    async def stream_response(request_args: Dict) -> Tuple[str, int, bool]:
+        """
+        Streams a completion, closing the stream (which stops generation) on repetition.
+        Returns (text, generated_chunks, aborted); each content chunk is roughly one token.
+        """
+        stream = await client.chat.completions.create(stream=True, **request_args)
+        text = ""
+        chunks = 0
+        unchecked = 0
+        # Closing on every exit path (repetition, errors, Stop button) ends generation on the server
+        async with stream:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content or ""
+                if delta:
+                    chunks += 1
+                text += delta
+                unchecked += len(delta)
+                if unchecked >= REPETITION_CHECK_INTERVAL:
+                    unchecked = 0
+                    if is_degenerate_repetition(text):
+                        return text, chunks, True
+        return text, chunks, False
 
-    async def get_response(prompt: str, max_tokens: int) -> str:
-        await rate_limiter.acquire()
+    async def get_response(prompt: str, max_tokens: int) -> Tuple[str, float, bool]:
+        if rate_limiter:
+            await rate_limiter.acquire()
         messages = []
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
         messages.append({"role": "user", "content": prompt})
         
+        request_args = {
+            "model": model_cfg.model_name,
+            "messages": messages,
+            "max_tokens": max_tokens
+        }
+        if stop_sequences:
+            request_args["stop"] = stop_sequences
+        
+        await concurrency.acquire()
+        latency = None
+        tokens = 1
         try:
-            response = await client.chat.completions.create(
-                model=model_cfg.model_name,
-                messages=messages,
-                max_tokens=max_tokens
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            raise e
+            request_start = time.monotonic()
+            if abort_repetition:
+                content, tokens, aborted = await stream_response(request_args)
+            else:
+                response = await client.chat.completions.create(**request_args)
+                content, aborted = response.choices[0].message.content, False
+                usage = getattr(response, "usage", None)
+                if usage and usage.completion_tokens:
+                    tokens = usage.completion_tokens
+                else:
+                    # Rough estimate for servers that don't report usage
+                    tokens = len(content or "") // 4
+            latency = time.monotonic() - request_start
+            return content, latency, aborted
+        finally:
+            # The limiter compares latency per generated token, so short and long requests mix
+            await concurrency.release(latency, tokens)
 
-    try:
-        for doc_idx, q_idx, entry in dataset_loader.iter_questions():
-            # Check for cancellation (fallback)
-            if should_stop and should_stop():
-                logger.log(f"[{model_cfg.alias}] Collection stopped by user.")
-                progress.status = "Stopped"
-                progress_callback(progress)
-                break
+    if length_predictor and num_workers > 1:
+        # Start long generations early so they overlap with the rest instead of forming the tail
+        questions = iter(length_predictor.order(list(dataset_loader.iter_questions()), collection_scope))
+        logger.log(f"[{model_cfg.alias}] Scheduling questions longest predicted response first.")
+    else:
+        questions = dataset_loader.iter_questions()
+    stop_requested = False
 
-            question = entry.get("question", "")
+    async def process_question(doc_idx: int, q_idx: int, entry: Dict):
+        question = entry.get("question", "")
+        short_resp = None
+        long_resp = None
+        latency = 0.0
+        flags = 0
+        
+        try:
+            # Short and long stay sequential per question; concurrency comes from the workers
             
-            # Prepare result entry preserving original data
-            result_entry = entry.copy()
+            # Short response
+            if collection_scope in ["Both", "Short Only"]:
+                short_resp, short_latency, short_aborted = await get_response(question, short_max_tokens)
+                latency += short_latency
+                if short_aborted:
+                    flags |= ResultStore.SHORT_ABORTED
             
-            try:
-                # Sequential execution for short and long to be safe and simple
-                
-                # Short response
-                if collection_scope in ["Both", "Short Only"]:
-                    short_resp = await get_response(question, short_max_tokens)
-                    result_entry["short_response"] = short_resp
-                else:
-                    result_entry["short_response"] = None
-                
-                # Long response
-                if collection_scope in ["Both", "Long Only"]:
-                    long_resp = await get_response(question, long_max_tokens)
-                    result_entry["long_response"] = long_resp
-                else:
-                    result_entry["long_response"] = None
-                
-                # Add to collected data
-                collected_data[doc_idx].append(result_entry)
-                
-            except Exception as e:
-                error_msg = str(e)
-                logger.log(f"[{model_cfg.alias}] Error on doc {doc_idx}, q {q_idx}: {error_msg}")
-                missing_responses.append({
-                    "doc_idx": doc_idx,
-                    "q_idx": q_idx,
-                    "question": question,
-                    "error": error_msg
-                })
+            # Long response
+            if collection_scope in ["Both", "Long Only"]:
+                long_resp, long_latency, long_aborted = await get_response(question, long_max_tokens)
+                latency += long_latency
+                if long_aborted:
+                    flags |= ResultStore.LONG_ABORTED
             
-            # Update progress
-            progress.completed += 1
-            progress_callback(progress)
+            result_store.record(doc_idx, q_idx, short_resp, long_resp, latency, flags)
+            if flags:
+                logger.log(f"[{model_cfg.alias}] Aborted repetitive output on doc {doc_idx}, q {q_idx}.")
+            if length_predictor:
+                length_predictor.observe(question, short_resp, long_resp)
+            
+        except Exception as e:
+            error_msg = str(e)
+            logger.log(f"[{model_cfg.alias}] Error on doc {doc_idx}, q {q_idx}: {error_msg}")
+            result_store.mark_failed(doc_idx, q_idx)
+            missing_responses.append({
+                "doc_idx": doc_idx,
+                "q_idx": q_idx,
+                "question": question,
+                "error": error_msg
+            })
+        
+        # Update progress
+        progress.completed += 1
+        progress.concurrency = concurrency.limit
+        progress.optimal_concurrency = concurrency.optimal_limit
+        progress_callback(progress)
+
+    async def worker():
+        nonlocal stop_requested
+        for doc_idx, q_idx, entry in questions:
+            # Check for cancellation (fallback)
+            if should_stop and should_stop():
+                if not stop_requested:
+                    stop_requested = True
+                    logger.log(f"[{model_cfg.alias}] Collection stopped by user.")
+                return
+            
+            await process_question(doc_idx, q_idx, entry)
             
             # Small yield to ensure UI updates if running in same loop (though this is async)
             await asyncio.sleep(0)
 
+    try:
+        # Workers share one question iterator; the limiter decides how many requests actually run
+        await asyncio.gather(*(worker() for _ in range(num_workers)))
+
     except asyncio.CancelledError:
         logger.log(f"[{model_cfg.alias}] Collection task cancelled.")
         progress.status = "Stopped"
         progress_callback(progress)
-        return collected_data, missing_responses
+        return result_store, missing_responses
+
+    if stop_requested:
+        progress.status = "Stopped"
+        progress_callback(progress)
+        return result_store, missing_responses
 
     progress.status = "Completed"
     progress_callback(progress)
-    logger.log(f"[{model_cfg.alias}] Collection finished. {len(missing_responses)} missing.")
+    if self_hosted and concurrency.optimal_limit:
+        logger.log(f"[{model_cfg.alias}] Measured optimal concurrency: {concurrency.optimal_limit}")
+    logger.log(f"[{model_cfg.alias}] Collection finished. {len(missing_responses)} missing. Mean latency per question: {result_store.mean_latency:.2f}s")
     
-    return collected_data, missing_responses
+    return result_store, missing_responses
 
 async def test_provider(model_cfg: ModelConfig) -> Tuple[bool, str]:
     """
@@ -0,0 +1,144 @@
+import asyncio
+import time
+from typing import Dict, Optional
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limits the number of in-flight requests to an endpoint and adjusts the
+    limit from measured throughput and latency (Vegas-style).
+
+    Starts with a probe phase that doubles the limit while throughput keeps
+    improving, then settles on the best limit seen and nudges it up or down
+    by one depending on how much queueing the latency samples suggest.
+    Samples are normalised per generated token, so short and long requests
+    can be mixed in the same window. The knee is measured per model: when a
+    different model starts on the endpoint, the probe starts over.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 1,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        alpha: float = 2.0,
+        beta: float = 4.0,
+        probe_gain: float = 1.1,
+        min_window_seconds: float = 1.0,
+        adaptive: bool = True
+    ):
+        self.initial_limit = max(min_limit, min(initial_limit, max_limit))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.alpha = alpha
+        self.beta = beta
+        self.probe_gain = probe_gain
+        self.min_window_seconds = min_window_seconds
+        self.adaptive = adaptive
+
+        self.in_flight = 0
+        self.model_name: Optional[str] = None
+        self._condition = asyncio.Condition()
+        self._reset_probe()
+
+    def _reset_probe(self):
+        self.limit = self.initial_limit
+        self.probing = self.adaptive
+        # Lowest latency per generated token seen; only ever moves down
+        self.min_latency: Optional[float] = None
+        # Best throughput in generated tokens per second
+        self.best_throughput = 0.0
+        # 0 until a knee has been measured; stays 0 when not adaptive
+        self.optimal_limit = 0
+        self._reset_window()
+
+    def start_model(self, model_name: str):
+        """
+        Called when a model starts collecting. A different model on the same endpoint
+        has its own knee, so the measurements so far are dropped and the probe restarts.
+        """
+        if model_name == self.model_name:
+            return
+        self.model_name = model_name
+        self._reset_probe()
+
+    def _reset_window(self):
+        self._window_start = time.monotonic()
+        self._window_completed = 0
+        self._window_tokens = 0
+        self._window_latency = 0.0
+
+    async def acquire(self):
+        async with self._condition:
+            while self.in_flight >= self.limit:
+                await self._condition.wait()
+            self.in_flight += 1
+
+    async def release(self, latency: Optional[float] = None, tokens: int = 1):
+        """
+        Frees a slot. Pass the latency and number of generated tokens of successful
+        requests; failures say nothing about capacity.
+        """
+        async with self._condition:
+            self.in_flight -= 1
+            if latency is not None and self.adaptive:
+                self._record(latency, max(tokens, 1))
+            self._condition.notify_all()
+
+    def _record(self, latency: float, tokens: int):
+        per_token = latency / tokens
+        if self.min_latency is None or per_token < self.min_latency:
+            self.min_latency = per_token
+        self._window_completed += 1
+        self._window_tokens += tokens
+        self._window_latency += latency
+
+        elapsed = time.monotonic() - self._window_start
+        # A window needs enough samples to cover every slot at least once
+        if self._window_completed < self.limit or elapsed < self.min_window_seconds:
+            return
+
+        throughput = self._window_tokens / elapsed
+        avg_latency = self._window_latency / self._window_tokens
+        self._adjust(throughput, avg_latency)
+        self._reset_window()
+
+    def _adjust(self, throughput: float, avg_latency: float):
+        previous_best = self.best_throughput
+        improved = previous_best == 0 or throughput >= previous_best * self.probe_gain
+        # A higher limit must clearly beat the best so noise can't walk the knee upwards
+        if improved or (throughput > previous_best and self.limit <= self.optimal_limit):
+            self.best_throughput = throughput
+            self.optimal_limit = self.limit
+
+        if self.probing:
+            if improved and self.limit < self.max_limit:
+                self.limit = min(self.limit * 2, self.max_limit)
+                return
+            # Throughput stopped scaling: fall back to the knee we found
+            self.probing = False
+            self.limit = max(self.optimal_limit, self.min_limit)
+            return
+
+        # Estimated number of requests queued on the server rather than being served
+        queued = self.limit * (1 - self.min_latency / avg_latency) if avg_latency > 0 else 0.0
+        if queued < self.alpha:
+            self.limit += 1
+        elif queued > self.beta:
+            self.limit -= 1
+
+        # Past the knee extra slots only add latency, so explore at most one above it
+        self.limit = max(self.min_limit, min(self.limit, self.optimal_limit + 1, self.max_limit))
+
+# Limiters shared by every model that talks to the same self-hosted endpoint
+_endpoint_limiters: Dict[str, AdaptiveConcurrencyLimiter] = {}
+
+def get_endpoint_limiter(base_url: str, max_limit: int) -> AdaptiveConcurrencyLimiter:
+    """Returns the adaptive limiter for an endpoint, creating it on first use."""
+    key = base_url.rstrip("/")
+    if key not in _endpoint_limiters:
+        _endpoint_limiters[key] = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=max_limit)
+    return _endpoint_limiters[key]
+
+def reset_endpoint_limiters():
+    """Forgets all endpoint limiters so a new collection run probes from scratch."""
+    _endpoint_limiters.clear()
@@ -1,6 +1,6 @@
 import json
 import os
-from typing import Generator, Tuple, Dict, Any, List
+from typing import Generator, Tuple, Dict, Any
 
 class DatasetLoader:
     def __init__(self):
@@ -58,10 +58,3 @@ class DatasetLoader:
         for doc_idx, doc in enumerate(self.dataset["data"]):
             for q_idx, question_entry in enumerate(doc):
                 yield doc_idx, q_idx, question_entry
-
-    def get_empty_structure(self) -> List[List[Dict]]:
-        """Returns a structure matching the input dataset but empty, to be filled."""
-        if not self.dataset:
-            return []
-        # Create a list of empty lists, one for each document
-        return [[] for _ in self.dataset["data"]]
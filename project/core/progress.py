@@ -8,6 +8,8 @@ class ProgressState:
     total: int
     start_time: float
     status: str = "Pending"
+    concurrency: int = 0
+    optimal_concurrency: int = 0
 
     @property
     def progress_pct(self) -> float:
@@ -26,10 +28,12 @@ class ProgressState:
 
     def to_list(self):
         eta_str = f"{int(self.eta_seconds)}s" if self.status == "Running" else "-"
+        optimal_str = str(self.optimal_concurrency) if self.optimal_concurrency else "-"
         return [
             self.model_alias,
             f"{self.progress_pct:.1f}%",
             f"{self.completed}/{self.total}",
             eta_str,
+            f"{self.concurrency} (opt {optimal_str})",
             self.status
         ]
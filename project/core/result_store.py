@@ -0,0 +1,95 @@
+from array import array
+from itertools import accumulate
+from typing import Dict, Generator, List, Optional, Tuple
+from .dataset_loader import DatasetLoader
+
+class ResultStore:
+    """
+    Per-model collected responses stored column-wise and indexed by (doc_idx, q_idx).
+
+    Source entries are referenced from the shared DatasetLoader and never copied;
+    merged output dicts are only built while serialising.
+    """
+
+    __slots__ = ("_source", "_offsets", "short_responses", "long_responses", "status", "latency", "flags")
+
+    PENDING = 0
+    COMPLETED = 1
+    FAILED = 2
+
+    # Bits in `flags` for responses cut off early because they degenerated into repetition
+    SHORT_ABORTED = 1
+    LONG_ABORTED = 2
+
+    def __init__(self, dataset_loader: DatasetLoader):
+        self._source: List[List[Dict]] = dataset_loader.dataset["data"] if dataset_loader.dataset else []
+        # Flat index of the first question of each document
+        self._offsets = [0] + list(accumulate(len(doc) for doc in self._source))
+        size = self._offsets[-1]
+        self.short_responses: List[Optional[str]] = [None] * size
+        self.long_responses: List[Optional[str]] = [None] * size
+        self.status = array('b', bytes(size))
+        self.latency = array('d', bytes(8 * size))
+        self.flags = array('b', bytes(size))
+
+    def _index(self, doc_idx: int, q_idx: int) -> int:
+        return self._offsets[doc_idx] + q_idx
+
+    def record(self, doc_idx: int, q_idx: int, short_response: Optional[str], long_response: Optional[str], latency: float = 0.0, flags: int = 0):
+        """Stores the responses for a question and marks it completed."""
+        i = self._index(doc_idx, q_idx)
+        self.short_responses[i] = short_response
+        self.long_responses[i] = long_response
+        self.latency[i] = latency
+        self.flags[i] = flags
+        self.status[i] = self.COMPLETED
+
+    def mark_failed(self, doc_idx: int, q_idx: int):
+        self.status[self._index(doc_idx, q_idx)] = self.FAILED
+
+    @property
+    def num_completed(self) -> int:
+        return self.status.count(self.COMPLETED)
+
+    @property
+    def mean_latency(self) -> float:
+        completed = [self.latency[i] for i, s in enumerate(self.status) if s == self.COMPLETED]
+        return sum(completed) / len(completed) if completed else 0.0
+
+    def iter_lengths(self) -> Generator[Tuple[str, Optional[int], Optional[int]], None, None]:
+        """Yields (question, short_len, long_len) for completed questions, without building entries."""
+        for doc_idx, doc in enumerate(self._source):
+            offset = self._offsets[doc_idx]
+            for q_idx, entry in enumerate(doc):
+                i = offset + q_idx
+                if self.status[i] != self.COMPLETED:
+                    continue
+                short_resp = self.short_responses[i]
+                long_resp = self.long_responses[i]
+                yield (
+                    entry.get("question", ""),
+                    len(short_resp) if short_resp is not None else None,
+                    len(long_resp) if long_resp is not None else None
+                )
+
+    def iter_documents(self) -> Generator[List[Dict], None, None]:
+        """
+        Yields each document as a list of merged entries (source fields plus responses).
+        Questions that failed or were never reached are left out, as before.
+        """
+        for doc_idx, doc in enumerate(self._source):
+            offset = self._offsets[doc_idx]
+            merged = []
+            for q_idx, entry in enumerate(doc):
+                i = offset + q_idx
+                if self.status[i] != self.COMPLETED:
+                    continue
+                result_entry = dict(entry)
+                result_entry["short_response"] = self.short_responses[i]
+                result_entry["long_response"] = self.long_responses[i]
+                if self.flags[i] & self.SHORT_ABORTED:
+                    result_entry["short_response_flag"] = "repetition_aborted"
+                if self.flags[i] & self.LONG_ABORTED:
+                    result_entry["long_response_flag"] = "repetition_aborted"
+                merged.append(result_entry)
+            yield merged
@@ -0,0 +1,103 @@
+import glob
+import json
+import os
+import zlib
+from typing import Dict, List, Optional, Tuple
+from .result_store import ResultStore
+
+LENGTHS_SUFFIX = "_lengths.json"
+
+def question_key(question: str) -> int:
+    """Stable across processes (unlike hash()), so keys saved by one run match the next."""
+    return zlib.crc32(question.encode('utf-8'))
+
+def save_response_lengths(model_alias: str, result_store: ResultStore, filepath: str):
+    """
+    Writes a small sidecar with [question_key, prompt_len, short_len, long_len] per
+    completed question, so later runs can schedule without reading full outputs.
+    """
+    lengths = [
+        [question_key(question), len(question), short_len, long_len]
+        for question, short_len, long_len in result_store.iter_lengths()
+        if question
+    ]
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump({"model": model_alias, "lengths": lengths}, f, separators=(',', ':'))
+
+class LengthPredictor:
+    """
+    Predicts response length (in characters) per question so the longest
+    generations can be started first when requests run concurrently.
+
+    Uses lengths observed for the same question in earlier runs or other models;
+    questions never seen before are estimated from prompt length.
+    """
+
+    def __init__(self):
+        # question_key -> [short_total, short_count, long_total, long_count]
+        self._observed: Dict[int, List[int]] = {}
+        # [response_chars, prompt_chars] totals; their ratio estimates unseen questions
+        self._short_ratio = [0, 0]
+        self._long_ratio = [0, 0]
+
+    def _observe_lengths(self, key: int, prompt_len: int, short_len: Optional[int], long_len: Optional[int]):
+        stats = self._observed.setdefault(key, [0, 0, 0, 0])
+        if short_len is not None:
+            stats[0] += short_len
+            stats[1] += 1
+            self._short_ratio[0] += short_len
+            self._short_ratio[1] += prompt_len
+        if long_len is not None:
+            stats[2] += long_len
+            stats[3] += 1
+            self._long_ratio[0] += long_len
+            self._long_ratio[1] += prompt_len
+
+    def observe(self, question: str, short_response: Optional[str], long_response: Optional[str]):
+        if not question:
+            return
+        self._observe_lengths(
+            question_key(question),
+            len(question),
+            len(short_response) if short_response is not None else None,
+            len(long_response) if long_response is not None else None
+        )
+
+    def load_outputs(self, output_dir: str) -> int:
+        """Reads response lengths from previously saved *_lengths.json sidecars. Returns files read."""
+        loaded = 0
+        for path in glob.glob(os.path.join(output_dir, "*" + LENGTHS_SUFFIX)):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                for key, prompt_len, short_len, long_len in data.get("lengths", []):
+                    self._observe_lengths(key, prompt_len, short_len, long_len)
+                loaded += 1
+            except Exception:
+                pass # A broken or partial sidecar shouldn't block a new run
+        return loaded
+
+    def _predict_one(self, question: str, total: int, count: int, ratio: List) -> float:
+        if count:
+            return total / count
+        if ratio[1]:
+            return len(question) * ratio[0] / ratio[1]
+        return float(len(question))
+
+    def predict(self, question: str, collection_scope: str = "Both") -> float:
+        stats = self._observed.get(question_key(question), [0, 0, 0, 0])
+        predicted = 0.0
+        if collection_scope in ["Both", "Short Only"]:
+            predicted += self._predict_one(question, stats[0], stats[1], self._short_ratio)
+        if collection_scope in ["Both", "Long Only"]:
+            predicted += self._predict_one(question, stats[2], stats[3], self._long_ratio)
+        return predicted
+
+    def order(self, questions: List[Tuple[int, int, Dict]], collection_scope: str = "Both") -> List[Tuple[int, int, Dict]]:
+        """Sorts (doc_idx, q_idx, entry) tuples longest predicted response first."""
+        return sorted(
+            questions,
+            key=lambda item: self.predict(item[2].get("question", ""), collection_scope),
+            reverse=True
+        )
@@ -2,7 +2,7 @@ import json
 import os
 import time
 import asyncio
-from typing import Any, List, Dict
+from typing import Any, Iterable, List, Dict
 
 class AsyncRateLimiter:
     def __init__(self, max_calls: int, period: float = 1.0):
@@ -26,15 +26,68 @@ class AsyncRateLimiter:
         
         self.timestamps.append(now)
 
+# OpenAI-compatible APIs accept at most 4 stop sequences
+MAX_STOP_SEQUENCES = 4
+
+def parse_stop_sequences(text: str) -> List[str]:
+    """
+    Parses one stop sequence per line; a literal \\n is turned into a newline.
+    Callers must trim the result to MAX_STOP_SEQUENCES before sending it.
+    """
+    if not text:
+        return []
+    return [line.replace('\\n', '\n') for line in text.splitlines() if line.strip()]
+
+# Characters that make up Markdown horizontal rules and table separators
+MARKDOWN_RULE_CHARS = set("-=*_|:+ \t\n")
+MARKDOWN_RULE_MARKERS = set("-=*_|")
+
+def _is_markdown_rule_unit(unit: str) -> bool:
+    return all(ch in MARKDOWN_RULE_CHARS for ch in unit) and any(ch in MARKDOWN_RULE_MARKERS for ch in unit)
+
+def is_degenerate_repetition(text: str, min_period: int = 4, max_period: int = 200, min_span: int = 200, min_repeats: int = 4, max_rule_span: int = 1000) -> bool:
+    """
+    Detects outputs stuck in a loop: the tail of the text is the same unit
+    (min_period to max_period characters) repeated over at least min_span characters.
+    Markdown rules and table separators (e.g. "-" * 200 or "| --- " * 40) are
+    allowed up to max_rule_span characters; endless whitespace or "..." is not.
+    """
+    for period in range(min_period, max_period + 1):
+        repeats = max(min_repeats, -(-min_span // period))
+        span = period * repeats
+        # span doesn't grow monotonically with period, so a longer period may still fit
+        if span > len(text):
+            continue
+        unit = text[-period:]
+        if text[-span:] != unit * repeats:
+            continue
+        if not _is_markdown_rule_unit(unit):
+            return True
+        # Count how far back the rule-like run goes, stopping once it is clearly too long
+        run = span
+        while run <= max_rule_span and text[-run - period:-run] == unit:
+            run += period
+        if run > max_rule_span:
+            return True
+    return False
+
 def save_json(data: Any, filepath: str):
     """Saves data to a JSON file."""
     os.makedirs(os.path.dirname(filepath), exist_ok=True)
     with open(filepath, 'w', encoding='utf-8') as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
 
-def format_dataset_output(model_alias: str, data: List[List[Dict]]) -> Dict:
-    """Formats the collected data for the final dataset output."""
-    return {
-        "model": model_alias,
-        "data": data
-    }
+def save_dataset_output(model_alias: str, documents: Iterable[List[Dict]], filepath: str):
+    """
+    Writes the final dataset output ({"model": ..., "data": [...]}) one document at a time,
+    so only a single merged document is held in memory. Layout matches save_json.
+    """
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    with open(filepath, 'w', encoding='utf-8') as f:
+        f.write('{\n  "model": ' + json.dumps(model_alias, ensure_ascii=False) + ',\n  "data": [')
+        written = 0
+        for doc in documents:
+            doc_json = json.dumps(doc, indent=2, ensure_ascii=False).replace('\n', '\n    ')
+            f.write((',' if written else '') + '\n    ' + doc_json)
+            written += 1
+        f.write('\n  ]\n}' if written else ']\n}')
@@ -6,4 +6,7 @@ def render():
             short_tokens = gr.Number(value=100, label="Short Response Max Tokens", precision=0)
             long_tokens = gr.Number(value=500, label="Long Response Max Tokens", precision=0)
         system_prompt = gr.Textbox(label="System Prompt Override (Optional)", placeholder="You are a helpful assistant...", lines=2)
-    return short_tokens, long_tokens, system_prompt
+        with gr.Row():
+            stop_sequences = gr.Textbox(label="Stop Sequences (Optional, one per line, max 4)", placeholder="\\n\\nQuestion:", lines=2)
+            abort_repetition = gr.Checkbox(value=False, label="Abort Repetitive Outputs (streams responses)")
+    return short_tokens, long_tokens, system_prompt, stop_sequences, abort_repetition